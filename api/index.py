@@ -1,18 +1,79 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request
 from flask_cors import CORS
 import json
-import uuid
+import secrets
 from datetime import datetime
 import os
+import re
+import time
+import math
+import functools
+from collections import defaultdict, Counter
+import orjson
 
 app = Flask(__name__)
 CORS(app)
 
+# Fallback settings for anything still serialized by Flask's JSON provider
+app.json.sort_keys = False
+app.json.compact = True
+
 # Simple in-memory storage for demo
 documents = {}
 
+# ISO timestamp reused for up to 250ms so burst-polled endpoints skip re-formatting
+_last_ts = [0.0, ""]
+
+def now_iso():
+    t = time.time()
+    if t - _last_ts[0] > 0.25:
+        _last_ts[:] = [t, datetime.fromtimestamp(t).isoformat()]
+    return _last_ts[1]
+
+# Bumped on every upload so memoized search results never outlive the corpus
+_doc_version = 0
+
+# Inverted index: token -> {doc_id: term frequency}
+_TOKEN_RE = re.compile(r"\w+")
+_inverted_index = defaultdict(dict)
+
+def _index_document(doc_id, content_lower):
+    """Add a document's token counts to the inverted index"""
+    for token, tf in Counter(_TOKEN_RE.findall(content_lower)).items():
+        _inverted_index[token][doc_id] = tf
+
+@functools.lru_cache(maxsize=1024)
+def _search(q_lower, doc_version):
+    """Phrase search ranked by tf-idf, memoized per corpus version"""
+    postings = [_inverted_index.get(t, {}) for t in set(_TOKEN_RE.findall(q_lower))]
+    if postings:
+        # Only documents containing every query token can contain the phrase
+        candidates = set(postings[0]).intersection(*postings[1:])
+    else:
+        candidates = documents.keys()
+    
+    n_docs = len(documents)
+    scored = []
+    for doc_id in candidates:
+        if q_lower in documents[doc_id]['content_lower']:
+            score = sum(p[doc_id] * math.log(1 + n_docs / len(p)) for p in postings)
+            scored.append((score, doc_id))
+    scored.sort(reverse=True)
+    
+    top_score = scored[0][0] if scored else 0
+    return [
+        {
+            "document_id": doc_id,
+            "filename": documents[doc_id]['filename'],
+            "relevance_score": round(score / top_score, 3) if top_score else 0.8,
+            "content_snippet": documents[doc_id]['content'][:200]
+        }
+        for score, doc_id in scored
+    ]
+
 def handler(request):
     """Vercel serverless function handler"""
+    global _doc_version
     
     # Handle CORS preflight
     if request.method == 'OPTIONS':
@@ -25,6 +86,16 @@ def handler(request):
     path = request.path
     method = request.method
     
+    # Read the body once and parse JSON straight from the bytes with orjson,
+    # falling back to Werkzeug's parser only if orjson rejects the payload
+    raw_body = request.get_data(cache=True)
+    json_body = None
+    if raw_body and request.content_type and 'json' in request.content_type:
+        try:
+            json_body = orjson.loads(raw_body)
+        except orjson.JSONDecodeError:
+            json_body = request.get_json(silent=True, cache=True)
+    
     headers = {
         'Access-Control-Allow-Origin': '*',
         'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
@@ -32,9 +103,13 @@ def handler(request):
         'Content-Type': 'application/json'
     }
     
+    def _json(body, status=200):
+        # orjson emits bytes directly, skipping jsonify's stdlib encode step
+        return Response(orjson.dumps(body), status=status, mimetype='application/json', headers=headers)
+    
     try:
         if path == '/' or path == '/api':
-            return jsonify({
+            return _json({
                 "message": "AI Memory Bank API - Vercel Serverless",
                 "status": "running",
                 "version": "1.0.0",
@@ -44,14 +119,14 @@ def handler(request):
                     "documents": "GET /api/documents",
                     "health": "GET /api/health"
                 }
-            }), 200, headers
+            }, 200)
             
         elif path == '/api/health':
-            return jsonify({
+            return _json({
                 "status": "healthy",
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": now_iso(),
                 "documents_count": len(documents)
-            }), 200, headers
+            }, 200)
             
         elif path == '/api/documents':
             doc_list = []
@@ -60,70 +135,67 @@ def handler(request):
                     "id": doc_id,
                     "filename": doc["filename"],
                     "created_at": doc["created_at"],
-                    "content_preview": doc["content"][:100] + "..." if len(doc["content"]) > 100 else doc["content"]
+                    "content_preview": doc["content_preview"]
                 })
-            return jsonify({"documents": doc_list, "total": len(doc_list)}), 200, headers
+            return _json({"documents": doc_list, "total": len(doc_list)}, 200)
             
         elif path == '/api/upload' and method == 'POST':
             # Handle file upload
-            doc_id = str(uuid.uuid4())
+            doc_id = secrets.token_hex(16)
             filename = f"document_{len(documents)}.txt"
             
             # Get content from request
-            if request.content_type and 'application/json' in request.content_type:
-                data = request.get_json()
-                content = data.get('content', 'Sample AI Memory Bank content')
+            if json_body is not None:
+                content = json_body.get('content', 'Sample AI Memory Bank content')
             else:
-                content = request.get_data(as_text=True) or "AI Memory Bank: Your Personal Knowledge Assistant"
+                content = raw_body.decode('utf-8', errors='replace') or "AI Memory Bank: Your Personal Knowledge Assistant"
             
             documents[doc_id] = {
                 "id": doc_id,
                 "filename": filename,
                 "content": content[:1000],  # Limit content
-                "created_at": datetime.now().isoformat()
+                "content_lower": content[:1000].lower(),
+                "content_preview": content[:100] + "..." if len(content) > 100 else content,
+                "created_at": now_iso()
             }
+            _index_document(doc_id, documents[doc_id]["content_lower"])
+            _doc_version += 1
             
-            return jsonify({
+            return _json({
                 "document_id": doc_id,
                 "filename": filename,
                 "status": "uploaded",
                 "content_preview": content[:200] + "..." if len(content) > 200 else content
-            }), 200, headers
+            }, 200)
             
         elif path == '/api/query' and method == 'POST':
-            data = request.get_json()
-            query = data.get('query', '') if data else ''
+            query = json_body.get('query', '') if json_body else ''
             
-            # Simple search
-            results = []
-            for doc_id, doc in documents.items():
-                if query.lower() in doc['content'].lower():
-                    results.append({
-                        "document_id": doc_id,
-                        "filename": doc['filename'],
-                        "relevance_score": 0.8,
-                        "content_snippet": doc['content'][:200]
-                    })
+            # Simple search (cached results are shared, so only read from them)
+            results = _search(query.lower(), _doc_version)
             
             answer = f"Found {len(results)} documents matching '{query}'" if results else f"No matches for '{query}'"
             
-            return jsonify({
+            return _json({
                 "answer": answer,
                 "sources": results[:3],
                 "query": query,
                 "total_documents": len(documents)
-            }), 200, headers
+            }, 200)
             
         else:
-            return jsonify({"error": "Not found"}), 404, headers
+            return _json({"error": "Not found"}, 404)
             
     except Exception as e:
-        return jsonify({"error": str(e)}), 500, headers
+        return _json({"error": str(e)}, 500)
 
 # Default documents for demo
 documents["demo"] = {
     "id": "demo",
     "filename": "ai_memory_bank_info.txt",
     "content": "AI Memory Bank: Your Personal Knowledge Assistant. The AI Memory Bank is an intelligent document management and retrieval system that helps you organize, search, and gain insights from your personal knowledge collection. Features include multimodal processing, semantic search, knowledge graphs, and real-time collaboration.",
-    "created_at": datetime.now().isoformat()
-}
\ No newline at end of file
+    "created_at": now_iso()
+}
+documents["demo"]["content_lower"] = documents["demo"]["content"].lower()
+documents["demo"]["content_preview"] = documents["demo"]["content"][:100] + "..."
+_index_document("demo", documents["demo"]["content_lower"])
\ No newline at end of file
@@ -1,5 +1,5 @@
 from flask import Flask, request, jsonify
-import json
+import orjson
 from datetime import datetime
 
 app = Flask(__name__)
@@ -13,6 +13,8 @@ documents = {
         "created_at": datetime.now().isoformat()
     }
 }
+for _doc in documents.values():
+    _doc["content_lower"] = _doc["content"].lower()
 
 def handler(event, context):
     """Vercel serverless function for querying documents"""
@@ -34,13 +36,13 @@ def handler(event, context):
     
     try:
         # Parse request body
-        body = json.loads(event.get('body', '{}'))
+        body = orjson.loads(event.get('body') or b'{}')
         query = body.get('query', '').lower()
         
-        # Simple search
+        # Simple search; the query is matched as a phrase against the pre-lowercased content
         results = []
         for doc_id, doc in documents.items():
-            if query in doc['content'].lower():
+            if query in doc['content_lower']:
                 results.append({
                     "document_id": doc_id,
                     "filename": doc['filename'],
@@ -60,12 +62,12 @@ def handler(event, context):
         return {
             'statusCode': 200,
             'headers': headers,
-            'body': json.dumps(response)
+            'body': orjson.dumps(response).decode()
         }
         
     except Exception as e:
         return {
             'statusCode': 500,
             'headers': headers,
-            'body': json.dumps({"error": str(e)})
+            'body': orjson.dumps({"error": str(e)}).decode()
         }
\ No newline at end of file
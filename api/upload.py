@@ -1,6 +1,6 @@
 from flask import Flask, request, jsonify
-import json
-import uuid
+import orjson
+import secrets
 from datetime import datetime
 
 app = Flask(__name__)
@@ -35,12 +35,12 @@ def handler(event, context):
     
     try:
         # Parse request body
-        body = json.loads(event.get('body', '{}'))
+        body = orjson.loads(event.get('body') or b'{}')
         content = body.get('content', 'Sample document content')
         filename = body.get('filename', f'document_{len(documents)}.txt')
         
         # Create document
-        doc_id = str(uuid.uuid4())
+        doc_id = secrets.token_hex(16)
         documents[doc_id] = {
             "id": doc_id,
             "filename": filename,
@@ -58,12 +58,12 @@ def handler(event, context):
         return {
             'statusCode': 200,
             'headers': headers,
-            'body': json.dumps(response)
+            'body': orjson.dumps(response).decode()
         }
         
     except Exception as e:
         return {
             'statusCode': 500,
             'headers': headers,
-            'body': json.dumps({"error": str(e)})
+            'body': orjson.dumps({"error": str(e)}).decode()
         }
\ No newline at end of file
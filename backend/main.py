@@ -1,14 +1,22 @@
 from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
+from functools import lru_cache
 import os
+import asyncio
+import logging
+import time
+from collections import Counter
+import aiofiles
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Import our modules
 from services.document_processor import DocumentProcessor
 from services.audio_processor import AudioProcessor
@@ -21,12 +29,13 @@ from services.realtime_integrations import RealtimeIntegrationService
 from services.ai_learning_agent import AILearningAgent
 from services.collaboration_service import CollaborationService
 from services.analytics_service import AdvancedAnalyticsService
-from models.schemas import DocumentResponse, QueryRequest, QueryResponse
+from models.schemas import QueryRequest
 
 app = FastAPI(
     title="AI Memory Bank API",
     description="Personal knowledge assistant with RAG capabilities",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -38,28 +47,139 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize services
-document_processor = DocumentProcessor()
-enhanced_processor = EnhancedDocumentProcessor()
-audio_processor = AudioProcessor()
-image_processor = ImageProcessor()
-knowledge_graph = KnowledgeGraph()
-vector_store = VectorStore()
-rag_engine = RAGEngine(vector_store)
-realtime_service = RealtimeIntegrationService(document_processor, vector_store, knowledge_graph)
-ai_agent = AILearningAgent(knowledge_graph, vector_store, rag_engine)
-collaboration_service = CollaborationService()
-analytics_service = AdvancedAnalyticsService(vector_store, knowledge_graph)
+# Services are created lazily on first use so cold starts only pay for what a request needs
+@lru_cache(maxsize=1)
+def get_document_processor() -> DocumentProcessor:
+    return DocumentProcessor()
+
+@lru_cache(maxsize=1)
+def get_enhanced_processor() -> EnhancedDocumentProcessor:
+    return EnhancedDocumentProcessor()
+
+@lru_cache(maxsize=1)
+def get_audio_processor() -> AudioProcessor:
+    return AudioProcessor()
+
+@lru_cache(maxsize=1)
+def get_image_processor() -> ImageProcessor:
+    return ImageProcessor()
+
+@lru_cache(maxsize=1)
+def get_knowledge_graph_service() -> KnowledgeGraph:
+    return KnowledgeGraph()
+
+@lru_cache(maxsize=1)
+def get_vector_store() -> VectorStore:
+    return VectorStore()
+
+@lru_cache(maxsize=1)
+def get_rag_engine() -> RAGEngine:
+    return RAGEngine(get_vector_store())
+
+@lru_cache(maxsize=1)
+def get_realtime_service() -> RealtimeIntegrationService:
+    return RealtimeIntegrationService(get_document_processor(), get_vector_store(), get_knowledge_graph_service())
+
+@lru_cache(maxsize=1)
+def get_ai_agent() -> AILearningAgent:
+    return AILearningAgent(get_knowledge_graph_service(), get_vector_store(), get_rag_engine())
+
+@lru_cache(maxsize=1)
+def get_collaboration_service() -> CollaborationService:
+    return CollaborationService()
+
+@lru_cache(maxsize=1)
+def get_analytics_service() -> AdvancedAnalyticsService:
+    return AdvancedAnalyticsService(get_vector_store(), get_knowledge_graph_service())
 
 # Create uploads directory
 os.makedirs("uploads", exist_ok=True)
 
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+# Supported upload file types
+TEXT_EXTENSIONS = frozenset({'.txt', '.pdf', '.doc', '.docx', '.md'})
+AUDIO_EXTENSIONS = frozenset({'.mp3', '.wav', '.m4a', '.flac', '.ogg', '.aac'})
+IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.tiff'})
+ALL_EXTENSIONS = TEXT_EXTENSIONS | AUDIO_EXTENSIONS | IMAGE_EXTENSIONS
+SUPPORTED_EXTENSIONS_STR = ', '.join(sorted(ALL_EXTENSIONS))
+
+# Short-lived cache for the full document scan shared by several endpoints.
+# The version is bumped on upload/delete so writes invalidate it immediately.
+DOCUMENTS_CACHE_TTL = 30  # seconds
+_documents_version = 0
+_documents_cache = {"version": -1, "fetched_at": 0.0, "documents": []}
+
+async def get_all_documents():
+    """Return up to 1000 documents, reusing a recent scan when nothing changed"""
+    now = time.monotonic()
+    if (_documents_cache["version"] == _documents_version
+            and now - _documents_cache["fetched_at"] < DOCUMENTS_CACHE_TTL):
+        return _documents_cache["documents"]
+    
+    version = _documents_version
+    documents = await get_vector_store().get_documents(limit=1000)
+    _documents_cache.update(version=version, fetched_at=now, documents=documents)
+    return documents
+
+def invalidate_documents_cache():
+    """Mark cached document scans as stale after a write"""
+    global _documents_version
+    _documents_version += 1
+    if get_analytics_service.cache_info().currsize:
+        get_analytics_service().invalidate_document_cache()
+    if get_ai_agent.cache_info().currsize:
+        get_ai_agent().invalidate_document_state()
+
+# Knowledge extraction for audio/image uploads is batched on a background task
+KNOWLEDGE_BATCH_SIZE = 8
+KNOWLEDGE_BATCH_WAIT = 0.5  # seconds to wait for a batch to fill
+_knowledge_queue: Optional[asyncio.Queue] = None
+_knowledge_worker: Optional[asyncio.Task] = None
+
+async def _knowledge_extraction_worker(queue: asyncio.Queue):
+    """Drain queued documents in batches and store their extracted knowledge"""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await queue.get()]
+        deadline = loop.time() + KNOWLEDGE_BATCH_WAIT
+        while len(batch) < KNOWLEDGE_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        
+        try:
+            knowledge_graph = get_knowledge_graph_service()
+            extracted = await knowledge_graph.extract_batch(batch)
+        except Exception as e:
+            logger.error("Error in batched knowledge extraction: %s", e)
+            continue
+        
+        # Store each document on its own so one failure doesn't drop the rest of the batch
+        for document, knowledge_data in zip(batch, extracted):
+            try:
+                await knowledge_graph.store_knowledge(knowledge_data)
+            except Exception as e:
+                logger.error("Error storing knowledge for document %s: %s", document.id, e)
+
+def queue_knowledge_extraction(document):
+    """Queue a document for batched knowledge extraction"""
+    global _knowledge_queue, _knowledge_worker
+    if _knowledge_worker is None or _knowledge_worker.done():
+        _knowledge_queue = asyncio.Queue()
+        _knowledge_worker = asyncio.create_task(_knowledge_extraction_worker(_knowledge_queue))
+    _knowledge_queue.put_nowait(document)
+
 @app.get("/")
 async def root():
     return {"message": "AI Memory Bank API is running!"}
 
-@app.post("/upload", response_model=DocumentResponse)
-async def upload_file(file: UploadFile = File(...)):
+@app.post("/upload")
+async def upload_file(file: UploadFile = File(...), vector_store: VectorStore = Depends(get_vector_store)):
     """Upload and process any supported file type (text, audio, image)"""
     try:
         if not file.filename:
@@ -67,65 +187,67 @@ async def upload_file(file: UploadFile = File(...)):
         
         file_extension = os.path.splitext(file.filename)[1].lower()
         
-        # Define supported file types
-        text_extensions = {'.txt', '.pdf', '.doc', '.docx', '.md'}
-        audio_extensions = {'.mp3', '.wav', '.m4a', '.flac', '.ogg', '.aac'}
-        image_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.tiff'}
-        
-        all_extensions = text_extensions | audio_extensions | image_extensions
-        
-        if file_extension not in all_extensions:
+        if file_extension not in ALL_EXTENSIONS:
             raise HTTPException(
                 status_code=400,
-                detail=f"File type {file_extension} not supported. Supported: {', '.join(sorted(all_extensions))}"
+                detail=f"File type {file_extension} not supported. Supported: {SUPPORTED_EXTENSIONS_STR}"
             )
         
-        # Save uploaded file
+        # Save uploaded file, streaming in chunks so large uploads are never fully buffered
         file_path = f"uploads/{file.filename}"
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        async with aiofiles.open(file_path, "wb") as buffer:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                await buffer.write(chunk)
         
         # Process file based on type with knowledge extraction
-        if file_extension in text_extensions:
+        extraction_queued = False
+        if file_extension in TEXT_EXTENSIONS:
             # Use enhanced processor for text documents to extract knowledge
-            result = await enhanced_processor.process_file_with_knowledge_extraction(file_path)
+            result = await get_enhanced_processor().process_file_with_knowledge_extraction(file_path)
             document = result["document"]
             chunks = result.get("chunks", [])
-        elif file_extension in audio_extensions:
+        elif file_extension in AUDIO_EXTENSIONS:
+            audio_processor = get_audio_processor()
             document = await audio_processor.process_audio_file(file_path)
             chunks = getattr(audio_processor, 'chunks', [])
             # Extract knowledge from transcribed text
             if document.content:
-                knowledge_data = await knowledge_graph.extract_entities_and_relationships(document)
-                await knowledge_graph.store_knowledge(knowledge_data)
-        elif file_extension in image_extensions:
+                queue_knowledge_extraction(document)
+                extraction_queued = True
+        elif file_extension in IMAGE_EXTENSIONS:
+            image_processor = get_image_processor()
             document = await image_processor.process_image_file(file_path)
             chunks = getattr(image_processor, 'chunks', [])
             # Extract knowledge from image descriptions
             if document.content:
-                knowledge_data = await knowledge_graph.extract_entities_and_relationships(document)
-                await knowledge_graph.store_knowledge(knowledge_data)
+                queue_knowledge_extraction(document)
+                extraction_queued = True
         else:
             raise HTTPException(status_code=400, detail="Unsupported file type")
         
         # Store in vector database
         await vector_store.add_document(document, chunks)
+        invalidate_documents_cache()
         
-        return DocumentResponse(
-            id=document.id,
-            title=document.title,
-            status="completed",
-            message=f"{file_extension.upper()} file processed successfully",
-            summary=document.summary,
-            tags=document.tags
-        )
+        message = f"{file_extension.upper()} file processed successfully"
+        if extraction_queued:
+            message += "; knowledge extraction queued"
+        
+        # Plain dict straight to orjson; skips the response_model validation pass
+        return ORJSONResponse({
+            "id": document.id,
+            "title": document.title,
+            "status": "completed",
+            "message": message,
+            "summary": document.summary,
+            "tags": document.tags
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/query", response_model=QueryResponse)
-async def query_documents(request: QueryRequest):
+@app.post("/query")
+async def query_documents(request: QueryRequest, rag_engine: RAGEngine = Depends(get_rag_engine)):
     """Query documents using RAG"""
     try:
         response = await rag_engine.query(
@@ -133,45 +255,48 @@ async def query_documents(request: QueryRequest):
             filters=request.filters,
             top_k=request.top_k or 5
         )
-        return response
+        # The engine already built a QueryResponse; dump it once instead of re-validating
+        return ORJSONResponse(response.model_dump())
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/documents", response_model=List[DocumentResponse])
-async def get_documents(skip: int = 0, limit: int = 50):
+@app.get("/documents")
+async def get_documents(skip: int = 0, limit: int = 50, vector_store: VectorStore = Depends(get_vector_store)):
     """Get list of uploaded documents"""
     try:
         documents = await vector_store.get_documents(skip=skip, limit=limit)
-        return [
-            DocumentResponse(
-                id=doc.id,
-                title=doc.title,
-                status="completed",
-                message="",
-                summary=doc.summary,
-                tags=doc.tags
-            )
+        # Plain dicts straight to orjson; skips the response_model validation pass
+        return ORJSONResponse([
+            {
+                "id": doc.id,
+                "title": doc.title,
+                "status": "completed",
+                "message": "",
+                "summary": doc.summary,
+                "tags": doc.tags
+            }
             for doc in documents
-        ]
+        ])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/documents/{document_id}")
-async def delete_document(document_id: str):
+async def delete_document(document_id: str, vector_store: VectorStore = Depends(get_vector_store)):
     """Delete a document"""
     try:
         await vector_store.delete_document(document_id)
+        invalidate_documents_cache()
         return {"message": "Document deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/search/images")
-async def search_images(query: str):
+async def search_images(query: str, image_processor: ImageProcessor = Depends(get_image_processor)):
     """Search images by natural language description"""
     try:
         # Get all image documents from vector store
-        all_docs = await vector_store.get_documents(limit=1000)
+        all_docs = await get_all_documents()
         image_paths = [doc.file_path for doc in all_docs if doc.file_type in ['jpeg', 'png', 'gif', 'bmp', 'webp']]
         
         # Search using image processor
@@ -196,31 +321,22 @@ async def search_images(query: str):
 async def get_document_stats():
     """Get statistics about uploaded documents"""
     try:
-        all_docs = await vector_store.get_documents(limit=1000)
+        all_docs = await get_all_documents()
         
         stats = {
             "total_documents": len(all_docs),
-            "by_type": {},
-            "total_size_bytes": 0,
-            "recent_uploads": []
-        }
-        
-        for doc in all_docs:
-            # Count by type
-            file_type = doc.file_type
-            stats["by_type"][file_type] = stats["by_type"].get(file_type, 0) + 1
-            
-            # Total size
-            stats["total_size_bytes"] += doc.size_bytes or 0
-            
-            # Recent uploads (last 10)
-            if len(stats["recent_uploads"]) < 10:
-                stats["recent_uploads"].append({
+            "by_type": dict(Counter(doc.file_type for doc in all_docs)),
+            "total_size_bytes": sum(doc.size_bytes or 0 for doc in all_docs),
+            "recent_uploads": [
+                {
                     "id": doc.id,
                     "title": doc.title,
-                    "type": file_type,
-                    "uploaded_at": doc.uploaded_at.isoformat() if doc.uploaded_at else None
-                })
+                    "type": doc.file_type,
+                    "uploaded_at": doc.uploaded_at_iso
+                }
+                for doc in all_docs[:10]
+            ]
+        }
         
         return stats
         
@@ -228,7 +344,7 @@ async def get_document_stats():
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/knowledge-graph")
-async def get_knowledge_graph(limit: int = 100):
+async def get_knowledge_graph(limit: int = 100, knowledge_graph: KnowledgeGraph = Depends(get_knowledge_graph_service)):
     """Get knowledge graph data for visualization"""
     try:
         graph_data = await knowledge_graph.get_knowledge_graph_data(limit=limit)
@@ -237,7 +353,7 @@ async def get_knowledge_graph(limit: int = 100):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/knowledge-graph/concept/{concept_name}/related")
-async def get_related_concepts(concept_name: str, max_results: int = 10):
+async def get_related_concepts(concept_name: str, max_results: int = 10, knowledge_graph: KnowledgeGraph = Depends(get_knowledge_graph_service)):
     """Get concepts related to a specific concept"""
     try:
         related = await knowledge_graph.find_related_concepts(concept_name, max_results)
@@ -249,7 +365,7 @@ async def get_related_concepts(concept_name: str, max_results: int = 10):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/knowledge-graph/path/{start_concept}/{end_concept}")
-async def find_knowledge_path(start_concept: str, end_concept: str, max_depth: int = 3):
+async def find_knowledge_path(start_concept: str, end_concept: str, max_depth: int = 3, knowledge_graph: KnowledgeGraph = Depends(get_knowledge_graph_service)):
     """Find knowledge paths between two concepts"""
     try:
         paths = await knowledge_graph.search_knowledge_paths(start_concept, end_concept, max_depth)
@@ -263,28 +379,28 @@ async def find_knowledge_path(start_concept: str, end_concept: str, max_depth: i
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/documents/{document_id}/context")
-async def analyze_document_context(document_id: str):
+async def analyze_document_context(document_id: str, vector_store: VectorStore = Depends(get_vector_store), enhanced_processor: EnhancedDocumentProcessor = Depends(get_enhanced_processor)):
     """Analyze document context using knowledge graph"""
     try:
         # Get document from vector store
-        documents = await vector_store.get_documents(limit=1000)
-        document = next((doc for doc in documents if doc.id == document_id), None)
+        document = await vector_store.get_document(document_id)
         
         if not document:
             raise HTTPException(status_code=404, detail="Document not found")
         
         context = await enhanced_processor.analyze_document_context(document)
         return context
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/documents/{document_id}/suggestions")
-async def get_document_suggestions(document_id: str, limit: int = 10):
+async def get_document_suggestions(document_id: str, limit: int = 10, vector_store: VectorStore = Depends(get_vector_store), enhanced_processor: EnhancedDocumentProcessor = Depends(get_enhanced_processor)):
     """Get document suggestions based on knowledge graph"""
     try:
         # Get document from vector store
-        documents = await vector_store.get_documents(limit=1000)
-        document = next((doc for doc in documents if doc.id == document_id), None)
+        document = await vector_store.get_document(document_id)
         
         if not document:
             raise HTTPException(status_code=404, detail="Document not found")
@@ -294,15 +410,17 @@ async def get_document_suggestions(document_id: str, limit: int = 10):
             "document_id": document_id,
             "suggestions": suggestions
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/knowledge/summary")
-async def get_knowledge_summary():
+async def get_knowledge_summary(enhanced_processor: EnhancedDocumentProcessor = Depends(get_enhanced_processor)):
     """Get overall knowledge summary across all documents"""
     try:
         # Get all document IDs
-        documents = await vector_store.get_documents(limit=1000)
+        documents = await get_all_documents()
         document_ids = [doc.id for doc in documents]
         
         summary = await enhanced_processor.generate_knowledge_summary(document_ids)
@@ -313,12 +431,12 @@ async def get_knowledge_summary():
 # Real-time Integration Endpoints
 
 @app.websocket("/ws/{user_id}")
-async def websocket_endpoint(websocket: WebSocket, user_id: str):
+async def websocket_endpoint(websocket: WebSocket, user_id: str, realtime_service: RealtimeIntegrationService = Depends(get_realtime_service)):
     """WebSocket endpoint for real-time updates"""
     await realtime_service.connect_websocket(user_id, websocket)
 
 @app.post("/integrations/google-drive")
-async def setup_google_drive(user_id: str, credentials: Dict[str, Any]):
+async def setup_google_drive(user_id: str, credentials: Dict[str, Any], realtime_service: RealtimeIntegrationService = Depends(get_realtime_service)):
     """Setup Google Drive integration"""
     try:
         result = await realtime_service.setup_google_drive_integration(user_id, credentials)
@@ -327,7 +445,7 @@ async def setup_google_drive(user_id: str, credentials: Dict[str, Any]):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/integrations/notion")
-async def setup_notion(user_id: str, api_token: str, database_id: str):
+async def setup_notion(user_id: str, api_token: str, database_id: str, realtime_service: RealtimeIntegrationService = Depends(get_realtime_service)):
     """Setup Notion integration"""
     try:
         result = await realtime_service.setup_notion_integration(user_id, api_token, database_id)
@@ -336,7 +454,7 @@ async def setup_notion(user_id: str, api_token: str, database_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/integrations/slack")
-async def setup_slack(user_id: str, bot_token: str, channel_id: str):
+async def setup_slack(user_id: str, bot_token: str, channel_id: str, realtime_service: RealtimeIntegrationService = Depends(get_realtime_service)):
     """Setup Slack integration"""
     try:
         result = await realtime_service.setup_slack_integration(user_id, bot_token, channel_id)
@@ -345,7 +463,7 @@ async def setup_slack(user_id: str, bot_token: str, channel_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/webhooks")
-async def create_webhook(user_id: str, webhook_config: Dict[str, Any]):
+async def create_webhook(user_id: str, webhook_config: Dict[str, Any], realtime_service: RealtimeIntegrationService = Depends(get_realtime_service)):
     """Create webhook endpoint"""
     try:
         webhook = await realtime_service.setup_webhook_endpoint(user_id, webhook_config)
@@ -354,7 +472,7 @@ async def create_webhook(user_id: str, webhook_config: Dict[str, Any]):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/webhooks/{webhook_id}")
-async def process_webhook(webhook_id: str, payload: Dict[str, Any], signature: str = ""):
+async def process_webhook(webhook_id: str, payload: Dict[str, Any], signature: str = "", realtime_service: RealtimeIntegrationService = Depends(get_realtime_service)):
     """Process webhook payload"""
     try:
         result = await realtime_service.process_webhook_payload(webhook_id, payload, signature)
@@ -363,7 +481,7 @@ async def process_webhook(webhook_id: str, payload: Dict[str, Any], signature: s
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/integrations/{user_id}/status")
-async def get_integration_status(user_id: str):
+async def get_integration_status(user_id: str, realtime_service: RealtimeIntegrationService = Depends(get_realtime_service)):
     """Get integration status for user"""
     try:
         status = await realtime_service.get_integration_status(user_id)
@@ -374,7 +492,7 @@ async def get_integration_status(user_id: str):
 # AI Learning Agent Endpoints
 
 @app.get("/ai-agent/{user_id}/knowledge-gaps")
-async def analyze_knowledge_gaps(user_id: str):
+async def analyze_knowledge_gaps(user_id: str, ai_agent: AILearningAgent = Depends(get_ai_agent)):
     """Analyze knowledge gaps and learning opportunities"""
     try:
         analysis = await ai_agent.analyze_knowledge_gaps(user_id)
@@ -383,7 +501,7 @@ async def analyze_knowledge_gaps(user_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/ai-agent/learning-path")
-async def generate_learning_path(topic: str, current_level: str = "beginner", target_level: str = "advanced"):
+async def generate_learning_path(topic: str, current_level: str = "beginner", target_level: str = "advanced", ai_agent: AILearningAgent = Depends(get_ai_agent)):
     """Generate learning path for a topic"""
     try:
         path = await ai_agent.generate_learning_path(topic, current_level, target_level)
@@ -392,18 +510,28 @@ async def generate_learning_path(topic: str, current_level: str = "beginner", ta
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/ai-agent/{user_id}/daily-insights")
-async def get_daily_insights(user_id: str):
+async def get_daily_insights(user_id: str, ai_agent: AILearningAgent = Depends(get_ai_agent)):
     """Get daily learning insights and recommendations"""
     try:
         insights = await ai_agent.get_daily_insights(user_id)
-        return insights
+        # orjson encodes the slotted insight dataclasses natively, skipping jsonable_encoder's reflective walk
+        return ORJSONResponse(insights)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/ai-agent/daily-insights/batch")
+async def get_daily_insights_batch(user_ids: List[str], ai_agent: AILearningAgent = Depends(get_ai_agent)):
+    """Refresh daily insights for many users at once"""
+    try:
+        insights = await ai_agent.get_daily_insights_batch(user_ids)
+        return ORJSONResponse(insights)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # Collaboration Endpoints
 
 @app.post("/workspaces")
-async def create_workspace(owner_id: str, name: str, description: str = "", is_public: bool = False):
+async def create_workspace(owner_id: str, name: str, description: str = "", is_public: bool = False, collaboration_service: CollaborationService = Depends(get_collaboration_service)):
     """Create collaborative workspace"""
     try:
         workspace = await collaboration_service.create_workspace(owner_id, name, description, is_public)
@@ -412,7 +540,7 @@ async def create_workspace(owner_id: str, name: str, description: str = "", is_p
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/workspaces/{workspace_id}")
-async def get_workspace(workspace_id: str, user_id: str):
+async def get_workspace(workspace_id: str, user_id: str, collaboration_service: CollaborationService = Depends(get_collaboration_service)):
     """Get workspace details"""
     try:
         workspace = await collaboration_service.get_workspace(workspace_id, user_id)
@@ -423,7 +551,7 @@ async def get_workspace(workspace_id: str, user_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/users/{user_id}/workspaces")
-async def get_user_workspaces(user_id: str):
+async def get_user_workspaces(user_id: str, collaboration_service: CollaborationService = Depends(get_collaboration_service)):
     """Get user's workspaces"""
     try:
         workspaces = await collaboration_service.get_user_workspaces(user_id)
@@ -432,7 +560,7 @@ async def get_user_workspaces(user_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/workspaces/{workspace_id}/invite")
-async def invite_user(workspace_id: str, inviter_id: str, invitee_email: str, permission: str = "viewer"):
+async def invite_user(workspace_id: str, inviter_id: str, invitee_email: str, permission: str = "viewer", collaboration_service: CollaborationService = Depends(get_collaboration_service)):
     """Invite user to workspace"""
     try:
         invitation = await collaboration_service.invite_user(workspace_id, inviter_id, invitee_email, permission)
@@ -441,7 +569,7 @@ async def invite_user(workspace_id: str, inviter_id: str, invitee_email: str, pe
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/invitations/{invitation_id}/accept")
-async def accept_invitation(invitation_id: str, user_id: str):
+async def accept_invitation(invitation_id: str, user_id: str, collaboration_service: CollaborationService = Depends(get_collaboration_service)):
     """Accept workspace invitation"""
     try:
         result = await collaboration_service.accept_invitation(invitation_id, user_id)
@@ -450,7 +578,7 @@ async def accept_invitation(invitation_id: str, user_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/workspaces/{workspace_id}/analytics")
-async def get_collaboration_analytics(workspace_id: str, user_id: str):
+async def get_collaboration_analytics(workspace_id: str, user_id: str, collaboration_service: CollaborationService = Depends(get_collaboration_service)):
     """Get collaboration analytics"""
     try:
         analytics = await collaboration_service.get_collaboration_analytics(workspace_id, user_id)
@@ -461,7 +589,7 @@ async def get_collaboration_analytics(workspace_id: str, user_id: str):
 # Advanced Analytics Endpoints
 
 @app.get("/analytics/{user_id}/evolution")
-async def analyze_knowledge_evolution(user_id: str, days_back: int = 90):
+async def analyze_knowledge_evolution(user_id: str, days_back: int = 90, analytics_service: AdvancedAnalyticsService = Depends(get_analytics_service)):
     """Analyze knowledge evolution over time"""
     try:
         analysis = await analytics_service.analyze_knowledge_evolution(user_id, days_back)
@@ -470,7 +598,7 @@ async def analyze_knowledge_evolution(user_id: str, days_back: int = 90):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/analytics/{user_id}/impact")
-async def generate_impact_analysis(user_id: str):
+async def generate_impact_analysis(user_id: str, analytics_service: AdvancedAnalyticsService = Depends(get_analytics_service)):
     """Generate impact analysis of knowledge"""
     try:
         analysis = await analytics_service.generate_impact_analysis(user_id)
@@ -479,7 +607,7 @@ async def generate_impact_analysis(user_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/analytics/{user_id}/dashboard")
-async def get_analytics_dashboard(user_id: str):
+async def get_analytics_dashboard(user_id: str, analytics_service: AdvancedAnalyticsService = Depends(get_analytics_service)):
     """Get analytics dashboard data"""
     try:
         dashboard = await analytics_service.get_analytics_dashboard_data(user_id)
@@ -487,23 +615,30 @@ async def get_analytics_dashboard(user_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _service_health(getter) -> Dict[str, Any]:
+    """Report a service's health without forcing a lazy service to load"""
+    if not getter.cache_info().currsize:
+        return {"status": "not_loaded"}
+    return getter().health_check()
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    vector_store_loaded = get_vector_store.cache_info().currsize > 0
     return {
         "status": "healthy",
         "services": {
-            "vector_store": await vector_store.health_check(),
-            "document_processor": document_processor.health_check(),
-            "enhanced_processor": enhanced_processor.health_check(),
-            "audio_processor": audio_processor.health_check(),
-            "image_processor": image_processor.health_check(),
-            "knowledge_graph": knowledge_graph.health_check(),
-            "rag_engine": rag_engine.health_check(),
-            "realtime_integrations": realtime_service.health_check(),
-            "ai_learning_agent": ai_agent.health_check(),
-            "collaboration_service": collaboration_service.health_check(),
-            "analytics_service": analytics_service.health_check()
+            "vector_store": await get_vector_store().health_check() if vector_store_loaded else {"status": "not_loaded"},
+            "document_processor": _service_health(get_document_processor),
+            "enhanced_processor": _service_health(get_enhanced_processor),
+            "audio_processor": _service_health(get_audio_processor),
+            "image_processor": _service_health(get_image_processor),
+            "knowledge_graph": _service_health(get_knowledge_graph_service),
+            "rag_engine": _service_health(get_rag_engine),
+            "realtime_integrations": _service_health(get_realtime_service),
+            "ai_learning_agent": _service_health(get_ai_agent),
+            "collaboration_service": _service_health(get_collaboration_service),
+            "analytics_service": _service_health(get_analytics_service)
         }
     }
 
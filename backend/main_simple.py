@@ -4,15 +4,23 @@ Minimal version that works without heavy AI dependencies
 """
 
 import os
+import asyncio
 import uuid
+import re
+import sqlite3
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 import json
+import shutil
+import threading
+import time
+from collections import OrderedDict, deque
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form
+from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, FileResponse
+from starlette.concurrency import run_in_threadpool
 import uvicorn
 
 # Simple document models
@@ -28,7 +36,8 @@ class SimpleDocument:
 app = FastAPI(
     title="AI Memory Bank API",
     description="Simplified AI-powered personal knowledge assistant",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -40,10 +49,185 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Simple in-memory storage (replace with database in production)
-documents: Dict[str, SimpleDocument] = {}
+# Sliding-window POST timestamps per client IP (per worker process), least recently seen first
+request_log: "OrderedDict[str, deque]" = OrderedDict()
+
+def allow_request(client_ip: str) -> bool:
+    """Record a request from client_ip and report whether it is within the rate limit"""
+    now = time.monotonic()
+    # Drop clients whose newest request has left the window; LRU order keeps this amortized O(1)
+    while request_log:
+        oldest = next(iter(request_log.values()))
+        if oldest and now - oldest[-1] <= RATE_LIMIT_WINDOW:
+            break
+        request_log.popitem(last=False)
+    
+    log = request_log.get(client_ip)
+    if log is None:
+        log = request_log[client_ip] = deque()
+    else:
+        request_log.move_to_end(client_ip)
+        while log and now - log[0] > RATE_LIMIT_WINDOW:
+            log.popleft()
+    if len(log) >= RATE_LIMIT_REQUESTS:
+        return False
+    log.append(now)
+    # Cap tracked clients so a flood of new addresses can't grow memory without bound
+    while len(request_log) > RATE_LIMIT_MAX_CLIENTS:
+        request_log.popitem(last=False)
+    return True
+
+@app.middleware("http")
+async def guard_posts(request: Request, call_next):
+    """Rate-limit POSTs and reject oversized uploads before the body is parsed"""
+    if request.method == "POST":
+        if not allow_request(request.client.host if request.client else ''):
+            return ORJSONResponse({"error": "Too many requests"}, status_code=429)
+        try:
+            content_length = int(request.headers.get('content-length') or 0)
+        except ValueError:
+            return ORJSONResponse({"error": "Invalid Content-Length"}, status_code=400)
+        if request.url.path.startswith("/upload") and content_length > MAX_UPLOAD_SIZE:
+            return ORJSONResponse({"error": "File too large (max 50MB)"}, status_code=413)
+    return await call_next(request)
+
 upload_dir = Path("uploads")
 upload_dir.mkdir(exist_ok=True)
+UPLOAD_CHUNK_SIZE = 65536  # 64 KiB
+PREVIEW_BYTES = 4096  # enough for the 1000 chars of content kept per document
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024  # 50MB
+RATE_LIMIT_REQUESTS = 60  # POSTs allowed per client IP per window
+RATE_LIMIT_WINDOW = 60  # seconds
+RATE_LIMIT_MAX_CLIENTS = 10000  # client IPs tracked per worker
+upload_semaphore = asyncio.Semaphore(8)  # concurrent files per batch upload
+
+# Persistent SQLite storage with an FTS5 full-text index (BM25 ranking built in)
+DB_PATH = os.getenv("MEMORY_BANK_DB", "memory_bank.db")
+_TERM_RE = re.compile(r"\w+")
+
+def _connect() -> sqlite3.Connection:
+    """Open the document database, creating the tables on first use"""
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    # WAL lets several uvicorn workers read while one writes
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS documents (
+            pk INTEGER PRIMARY KEY,
+            id TEXT UNIQUE NOT NULL,
+            filename TEXT NOT NULL,
+            content TEXT NOT NULL,
+            file_type TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        );
+        CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+            filename, content,
+            content='documents', content_rowid='pk',
+            tokenize='porter unicode61'
+        );
+    """)
+    return conn
+
+db = _connect()
+# The connection is shared by threadpool workers; serialize use so transactions don't interleave
+db_lock = threading.Lock()
+
+# Bumped on every write through this connection; PRAGMA data_version covers other workers
+docs_version = 0
+
+def store_document(doc: SimpleDocument):
+    """Insert a document and its full-text index entry"""
+    global docs_version
+    with db_lock, db:
+        docs_version += 1
+        cursor = db.execute(
+            "INSERT INTO documents (id, filename, content, file_type, created_at) VALUES (?, ?, ?, ?, ?)",
+            (doc.id, doc.filename, doc.content, doc.file_type, doc.created_at.isoformat())
+        )
+        db.execute(
+            "INSERT INTO documents_fts (rowid, filename, content) VALUES (?, ?, ?)",
+            (cursor.lastrowid, doc.filename, doc.content)
+        )
+
+def get_document_row(document_id: str) -> Optional[sqlite3.Row]:
+    """Fetch a stored document by id"""
+    with db_lock:
+        return db.execute("SELECT * FROM documents WHERE id = ?", (document_id,)).fetchone()
+
+def remove_document(row: sqlite3.Row):
+    """Delete a document and its full-text index entry"""
+    global docs_version
+    with db_lock, db:
+        docs_version += 1
+        db.execute(
+            "INSERT INTO documents_fts (documents_fts, rowid, filename, content) VALUES ('delete', ?, ?, ?)",
+            (row["pk"], row["filename"], row["content"])
+        )
+        db.execute("DELETE FROM documents WHERE pk = ?", (row["pk"],))
+
+def count_documents() -> int:
+    """Number of stored documents"""
+    with db_lock:
+        return db.execute("SELECT count(*) FROM documents").fetchone()[0]
+
+def search_documents(match: str, limit: int = 3) -> Tuple[List[sqlite3.Row], int]:
+    """Top full-text matches by BM25 rank, plus the total number of matches"""
+    with db_lock:
+        rows = db.execute(
+            "SELECT d.id, d.filename, d.content, rank FROM documents_fts "
+            "JOIN documents d ON d.pk = documents_fts.rowid "
+            "WHERE documents_fts MATCH ? ORDER BY rank LIMIT ?",
+            (match, limit)
+        ).fetchall()
+        match_count = db.execute(
+            "SELECT count(*) FROM documents_fts WHERE documents_fts MATCH ?", (match,)
+        ).fetchone()[0]
+    return rows, match_count
+
+def list_document_rows() -> List[sqlite3.Row]:
+    """All stored documents in upload order"""
+    with db_lock:
+        return db.execute(
+            "SELECT id, filename, file_type, created_at, content FROM documents ORDER BY pk"
+        ).fetchall()
+
+class PerformanceOptimizations:
+    def __init__(self):
+        # LRU order doubles as eviction order; entries also expire after cache_ttl
+        self.response_cache = OrderedDict()
+        self.cache_ttl = 300  # 5 minutes
+        self.max_entries = 1024
+    
+    def get_cache_key(self, query: str) -> Tuple[int, int, str]:
+        """Generate cache key for query against the current corpus version"""
+        with db_lock:
+            data_version = db.execute("PRAGMA data_version").fetchone()[0]
+        return (docs_version, data_version, query)
+    
+    def get_cached_response(self, cache_key: Tuple[int, int, str]) -> Optional[Dict]:
+        """Get cached response if still valid"""
+        cached_item = self.response_cache.get(cache_key)
+        if cached_item is None:
+            return None
+        if time.time() - cached_item['timestamp'] < self.cache_ttl:
+            self.response_cache.move_to_end(cache_key)
+            return cached_item['response']
+        del self.response_cache[cache_key]
+        return None
+    
+    def cache_response(self, cache_key: Tuple[int, int, str], response: Dict):
+        """Cache response, evicting the least recently used entries past max_entries"""
+        self.response_cache[cache_key] = {
+            'response': response,
+            'timestamp': time.time()
+        }
+        self.response_cache.move_to_end(cache_key)
+        while len(self.response_cache) > self.max_entries:
+            self.response_cache.popitem(last=False)
+
+# Global performance optimizer
+perf_optimizer = PerformanceOptimizations()
 
 @app.get("/")
 async def root():
@@ -63,94 +247,146 @@ async def health_check():
         "timestamp": datetime.now().isoformat(),
         "services": {
             "api": "online",
-            "storage": "simple_memory",
-            "documents": len(documents)
+            "storage": "sqlite_fts5",
+            "documents": await run_in_threadpool(count_documents)
         }
     }
 
+def _save_upload(src, file_path: Path):
+    """Copy an upload's spooled file to disk one chunk at a time"""
+    # Write to a temp file and rename so a crash never leaves a partial upload
+    tmp_path = file_path.with_name(f".{file_path.name}.part")
+    try:
+        with open(tmp_path, "wb") as out:
+            shutil.copyfileobj(src, out, UPLOAD_CHUNK_SIZE)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, file_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+async def _ingest(file: UploadFile) -> Dict[str, Any]:
+    """Save an uploaded file and add it to the document store"""
+    # Chunked requests carry no Content-Length, so check the spooled size as well
+    if file.size is not None and file.size > MAX_UPLOAD_SIZE:
+        raise HTTPException(status_code=413, detail="File too large (max 50MB)")
+    
+    # Generate unique ID
+    doc_id = str(uuid.uuid4())
+    
+    # Save file on the threadpool so the copy doesn't block the event loop
+    file_path = upload_dir / f"{doc_id}_{file.filename}"
+    await run_in_threadpool(_save_upload, file.file, file_path)
+    
+    # Only the head of the file is needed for text extraction
+    await file.seek(0)
+    content = await file.read(PREVIEW_BYTES)
+    
+    # Simple text extraction
+    text_content = ""
+    if file.filename.lower().endswith('.txt'):
+        text_content = content.decode('utf-8', errors='ignore')
+    elif file.filename.lower().endswith('.md'):
+        text_content = content.decode('utf-8', errors='ignore')
+    else:
+        # For other file types, just store basic info
+        text_content = f"File: {file.filename} (content extraction not implemented in simple version)"
+    
+    # Create document
+    doc = SimpleDocument(
+        id=doc_id,
+        filename=file.filename,
+        content=text_content[:1000],  # Limit content length
+        file_type=file.content_type or "unknown"
+    )
+    
+    await run_in_threadpool(store_document, doc)
+    
+    return {
+        "document_id": doc_id,
+        "filename": file.filename,
+        "status": "uploaded",
+        "content_preview": text_content[:200] + "..." if len(text_content) > 200 else text_content,
+        "file_type": doc.file_type,
+        "created_at": doc.created_at.isoformat()
+    }
+
 @app.post("/upload")
 async def upload_file(file: UploadFile = File(...)):
     """Upload and process a document"""
     try:
-        # Generate unique ID
-        doc_id = str(uuid.uuid4())
-        
-        # Save file
-        file_path = upload_dir / f"{doc_id}_{file.filename}"
-        content = await file.read()
-        
-        with open(file_path, "wb") as f:
-            f.write(content)
-        
-        # Simple text extraction
-        text_content = ""
-        if file.filename.lower().endswith('.txt'):
-            text_content = content.decode('utf-8', errors='ignore')
-        elif file.filename.lower().endswith('.md'):
-            text_content = content.decode('utf-8', errors='ignore')
-        else:
-            # For other file types, just store basic info
-            text_content = f"File: {file.filename} (content extraction not implemented in simple version)"
-        
-        # Create document
-        doc = SimpleDocument(
-            id=doc_id,
-            filename=file.filename,
-            content=text_content[:1000],  # Limit content length
-            file_type=file.content_type or "unknown"
-        )
-        
-        documents[doc_id] = doc
-        
-        return {
-            "document_id": doc_id,
-            "filename": file.filename,
-            "status": "uploaded",
-            "content_preview": text_content[:200] + "..." if len(text_content) > 200 else text_content,
-            "file_type": doc.file_type,
-            "created_at": doc.created_at.isoformat()
-        }
-        
+        return await _ingest(file)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
+@app.post("/upload/batch")
+async def upload_files(files: List[UploadFile] = File(...)):
+    """Upload and process several documents concurrently"""
+    async def ingest_bounded(file: UploadFile):
+        async with upload_semaphore:
+            return await _ingest(file)
+    
+    results = await asyncio.gather(*(ingest_bounded(f) for f in files), return_exceptions=True)
+    
+    return [
+        {"filename": f.filename, "status": "error", "error": f"Upload failed: {str(result)}"}
+        if isinstance(result, Exception) else result
+        for f, result in zip(files, results)
+    ]
+
 @app.post("/query")
 async def query_documents(query: str = Form(...)):
     """Simple document search and Q&A"""
     try:
-        if not documents:
+        # Check cache first
+        cache_key = await run_in_threadpool(perf_optimizer.get_cache_key, query)
+        cached_result = perf_optimizer.get_cached_response(cache_key)
+        if cached_result is not None:
+            return cached_result
+        
+        total_documents = await run_in_threadpool(count_documents)
+        if not total_documents:
             return {
                 "answer": "No documents uploaded yet. Please upload some documents first!",
                 "sources": [],
                 "query": query
             }
         
-        # Simple keyword search
+        # Full-text search matching any query word, best BM25 rank first
         results = []
-        query_lower = query.lower()
-        
-        for doc_id, doc in documents.items():
-            if any(word in doc.content.lower() for word in query_lower.split()):
+        match_count = 0
+        match = " OR ".join(f'"{term}"' for term in _TERM_RE.findall(query.lower()))
+        if match:
+            rows, match_count = await run_in_threadpool(search_documents, match)
+            
+            # FTS5 rank is the BM25 score negated (lower is better), so the ratio to the top hit lands in (0, 1]
+            top_rank = rows[0]["rank"] if rows else 0
+            for row in rows:
                 results.append({
-                    "document_id": doc_id,
-                    "filename": doc.filename,
-                    "relevance_score": 0.8,  # Simplified scoring
-                    "content_snippet": doc.content[:300]
+                    "document_id": row["id"],
+                    "filename": row["filename"],
+                    "relevance_score": round(row["rank"] / top_rank, 3) if top_rank else 0.8,
+                    "content_snippet": row["content"][:300]
                 })
         
         # Simple answer generation
         if results:
-            answer = f"Found {len(results)} relevant document(s) for your query '{query}'. "
+            answer = f"Found {match_count} relevant document(s) for your query '{query}'. "
             answer += f"Most relevant content: {results[0]['content_snippet'][:200]}..."
         else:
             answer = f"No relevant documents found for query '{query}'. Try uploading more documents or using different keywords."
         
-        return {
+        response = {
             "answer": answer,
-            "sources": results[:3],  # Limit to top 3 results
+            "sources": results,  # Top 3 results
             "query": query,
-            "total_documents": len(documents)
+            "total_documents": total_documents
         }
+        perf_optimizer.cache_response(cache_key, response)
+        
+        return response
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
@@ -159,13 +395,13 @@ async def query_documents(query: str = Form(...)):
 async def list_documents():
     """List all uploaded documents"""
     doc_list = []
-    for doc_id, doc in documents.items():
+    for row in await run_in_threadpool(list_document_rows):
         doc_list.append({
-            "id": doc_id,
-            "filename": doc.filename,
-            "file_type": doc.file_type,
-            "created_at": doc.created_at.isoformat(),
-            "content_preview": doc.content[:100] + "..." if len(doc.content) > 100 else doc.content
+            "id": row["id"],
+            "filename": row["filename"],
+            "file_type": row["file_type"],
+            "created_at": row["created_at"],
+            "content_preview": row["content"][:100] + "..." if len(row["content"]) > 100 else row["content"]
         })
     
     return {
@@ -176,39 +412,51 @@ async def list_documents():
 @app.get("/documents/{document_id}")
 async def get_document(document_id: str):
     """Get specific document details"""
-    if document_id not in documents:
+    row = await run_in_threadpool(get_document_row, document_id)
+    if row is None:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    doc = documents[document_id]
     return {
         "id": document_id,
-        "filename": doc.filename,
-        "content": doc.content,
-        "file_type": doc.file_type,
-        "created_at": doc.created_at.isoformat()
+        "filename": row["filename"],
+        "content": row["content"],
+        "file_type": row["file_type"],
+        "created_at": row["created_at"]
     }
 
+@app.get("/documents/{document_id}/file")
+async def download_document(document_id: str):
+    """Download the original uploaded file"""
+    row = await run_in_threadpool(get_document_row, document_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    file_path = upload_dir / f"{document_id}_{row['filename']}"
+    if not file_path.exists():
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    # FileResponse streams from disk using sendfile where the server supports it
+    return FileResponse(file_path, filename=row["filename"])
+
 @app.delete("/documents/{document_id}")
 async def delete_document(document_id: str):
     """Delete a document"""
-    if document_id not in documents:
+    row = await run_in_threadpool(get_document_row, document_id)
+    if row is None:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    doc = documents[document_id]
-    
     # Remove from storage
-    del documents[document_id]
+    await run_in_threadpool(remove_document, row)
     
     # Try to remove file
     try:
-        file_path = upload_dir / f"{document_id}_{doc.filename}"
-        if file_path.exists():
-            file_path.unlink()
+        file_path = upload_dir / f"{document_id}_{row['filename']}"
+        await run_in_threadpool(file_path.unlink, missing_ok=True)
     except Exception:
         pass  # File removal not critical
     
     return {
-        "message": f"Document {doc.filename} deleted successfully",
+        "message": f"Document {row['filename']} deleted successfully",
         "document_id": document_id
     }
 
@@ -216,12 +464,13 @@ async def delete_document(document_id: str):
 async def get_stats():
     """Get system statistics"""
     return {
-        "total_documents": len(documents),
-        "storage_type": "in_memory",
+        "total_documents": await run_in_threadpool(count_documents),
+        "storage_type": "sqlite_fts5",
+        "cache_size": len(perf_optimizer.response_cache),
         "uptime": "running",
         "features": {
             "upload": "✅ Available",
-            "search": "✅ Basic keyword search",
+            "search": "✅ Full-text search (SQLite FTS5)",
             "ai_models": "⚠️ Simplified (no heavy AI)",
             "knowledge_graph": "❌ Not available in simple mode",
             "multimodal": "❌ Not available in simple mode"
@@ -234,4 +483,13 @@ if __name__ == "__main__":
     print("📚 API Documentation: http://localhost:8000/docs")
     print("🔍 To test: Upload a text file and then query it!")
     
-    uvicorn.run("main_simple:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    # Documents live in SQLite, so several workers can share them; "auto" picks
+    # uvloop and httptools whenever they are installed (uvicorn[standard])
+    uvicorn.run(
+        "main_simple:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="auto",
+        http="auto",
+        workers=min(4, os.cpu_count() or 1)
+    )
\ No newline at end of file
@@ -1,7 +1,8 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 from enum import Enum
+from functools import cached_property
 
 class DocumentStatus(str, Enum):
     PROCESSING = "processing"
@@ -28,6 +29,21 @@ class Document(BaseModel):
     processed_at: Optional[datetime] = None
     chunk_ids: List[str] = Field(default_factory=list, description="Associated chunk IDs")
 
+    @cached_property
+    def uploaded_at_iso(self) -> Optional[str]:
+        """ISO-formatted upload time, formatted once per instance"""
+        return self.uploaded_at.isoformat() if self.uploaded_at else None
+
+    @cached_property
+    def top_tags(self) -> Tuple[str, ...]:
+        """First five tags as an immutable tuple, built once per instance"""
+        return tuple(self.tags[:5])
+
+    @cached_property
+    def snippet(self) -> str:
+        """Lowercased, whitespace-normalized start of the content used for text analytics"""
+        return " ".join(self.content[:1000].split()).lower()  # Limit length for performance
+
 class DocumentChunk(BaseModel):
     id: str = Field(..., description="Unique chunk identifier")
     document_id: str = Field(..., description="Parent document ID")
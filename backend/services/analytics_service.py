@@ -1,17 +1,22 @@
 import logging
 import asyncio
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 from datetime import datetime, timedelta
 from collections import defaultdict, Counter
-import json
+import heapq
+import math
+import time
 import numpy as np
+import orjson
 from pathlib import Path
 
 # ML imports for predictive analytics
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.utils import murmurhash3_32
 from sklearn.cluster import KMeans
 from sklearn.decomposition import LatentDirichletAllocation
 import pandas as pd
+from scipy.sparse import csr_matrix
 
 from services.vector_store import VectorStore
 from services.knowledge_graph import KnowledgeGraph
@@ -19,6 +24,21 @@ from models.schemas import Document
 
 logger = logging.getLogger(__name__)
 
+# Hashed feature space for topic modeling; fixed so the LDA model can be refined across calls
+HASH_FEATURES = 2 ** 14
+DOCUMENT_CACHE_TTL = 30  # seconds
+
+def _mean_std(values: List[float]) -> Tuple[float, float]:
+    """Population mean and standard deviation in a single pass, without NumPy dispatch"""
+    n = len(values)
+    if not n:
+        return 0.0, 0.0
+    mean = math.fsum(values) / n
+    s2 = 0.0
+    for v in values:
+        s2 += v * v
+    return mean, math.sqrt(max(s2 / n - mean * mean, 0.0))
+
 class AdvancedAnalyticsService:
     """Service for advanced analytics, trends, and predictive insights"""
     
@@ -26,23 +46,35 @@ class AdvancedAnalyticsService:
         self.vector_store = vector_store
         self.knowledge_graph = knowledge_graph
         self.analytics_storage = "analytics_data"
-        self.vectorizer = None
+        self.hasher = None
+        self.tfidf = None
         self.topic_model = None
+        self._topic_model_fitted = False
+        self._topic_model_lock = asyncio.Lock()
+        self._hash_vocab: Dict[int, str] = {}
+        self._word_count_cache: Dict[str, int] = {}
+        self._doc_cache: Optional[Tuple[float, int, List[Document]]] = None
         Path(self.analytics_storage).mkdir(exist_ok=True)
         self._initialize_ml_models()
     
     def _initialize_ml_models(self):
         """Initialize ML models for analytics"""
         try:
-            self.vectorizer = TfidfVectorizer(
-                max_features=1000,
+            # Stateless hasher: no vocabulary is learned, so texts are never re-scanned to fit one
+            self.hasher = HashingVectorizer(
+                n_features=HASH_FEATURES,
                 stop_words='english',
-                ngram_range=(1, 2)
+                ngram_range=(1, 2),
+                alternate_sign=False,
+                norm=None
             )
+            self.tfidf = TfidfTransformer(sublinear_tf=True)
             self.topic_model = LatentDirichletAllocation(
                 n_components=10,
                 random_state=42,
-                max_iter=20
+                max_iter=10,
+                learning_method='online',
+                batch_size=128
             )
             logger.info("Analytics ML models initialized successfully")
         except Exception as e:
@@ -51,7 +83,9 @@ class AdvancedAnalyticsService:
     async def analyze_knowledge_evolution(self, user_id: str = "default", days_back: int = 90) -> Dict[str, Any]:
         """Analyze how knowledge has evolved over time"""
         try:
-            documents = await self.vector_store.get_documents(limit=1000)
+            # Word counts are memoized per analysis run only, to bound memory
+            self._word_count_cache.clear()
+            documents = await self._get_documents(limit=1000)
             
             if not documents:
                 return {"error": "No documents found for analysis"}
@@ -66,21 +100,21 @@ class AdvancedAnalyticsService:
                 "trend_predictions": {}
             }
             
-            # Timeline analysis
-            timeline = await self._analyze_timeline(documents, days_back)
-            evolution_analysis["timeline_analysis"] = timeline
-            
-            # Topic evolution
-            topic_evolution = await self._analyze_topic_evolution(documents, days_back)
-            evolution_analysis["topic_evolution"] = topic_evolution
-            
-            # Knowledge growth metrics
-            growth_metrics = await self._calculate_growth_metrics(documents, days_back)
-            evolution_analysis["knowledge_growth"] = growth_metrics
-            
-            # Trend predictions
-            predictions = await self._predict_trends(documents)
-            evolution_analysis["trend_predictions"] = predictions
+            # The sections are independent. The CPU-bound ones run in worker threads so they
+            # overlap each other and trend prediction's graph I/O without blocking the event loop
+            results = await asyncio.gather(
+                asyncio.to_thread(self._analyze_timeline, documents, days_back),
+                asyncio.to_thread(self._analyze_topic_evolution, documents, days_back),
+                asyncio.to_thread(self._calculate_growth_metrics, documents, days_back),
+                self._predict_trends(documents),
+                return_exceptions=True
+            )
+            sections = ("timeline_analysis", "topic_evolution", "knowledge_growth", "trend_predictions")
+            for section, result in zip(sections, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error computing {section}: {result}")
+                    continue
+                evolution_analysis[section] = result
             
             # Save analysis for historical comparison
             await self._save_evolution_snapshot(evolution_analysis)
@@ -91,50 +125,61 @@ class AdvancedAnalyticsService:
             logger.error(f"Error analyzing knowledge evolution: {e}")
             return {"error": str(e)}
     
-    async def _analyze_timeline(self, documents: List[Document], days_back: int) -> Dict[str, Any]:
+    async def _get_documents(self, limit: int) -> List[Document]:
+        """Fetch documents, reusing a scan from the last few seconds so back-to-back analyses share it"""
+        now = time.monotonic()
+        cached = self._doc_cache
+        if cached and cached[1] == limit and now - cached[0] < DOCUMENT_CACHE_TTL:
+            return cached[2]
+        documents = await self.vector_store.get_documents(limit=limit)
+        self._doc_cache = (now, limit, documents)
+        return documents
+    
+    def invalidate_document_cache(self):
+        """Drop the cached document scan after documents are added or removed"""
+        self._doc_cache = None
+    
+    def _analyze_timeline(self, documents: List[Document], days_back: int) -> Dict[str, Any]:
         """Analyze document upload timeline"""
         try:
             cutoff_date = datetime.utcnow() - timedelta(days=days_back)
             
-            # Group documents by time periods
-            daily_counts = defaultdict(int)
-            weekly_counts = defaultdict(int)
-            monthly_counts = defaultdict(int)
-            topic_timeline = defaultdict(lambda: defaultdict(int))
+            # One frame of (timestamp, tags) for the period; all grouping below runs in pandas
+            recent = [(doc.uploaded_at, doc.tags) for doc in documents if doc.uploaded_at and doc.uploaded_at >= cutoff_date]
+            df = pd.DataFrame({
+                "ts": pd.to_datetime([uploaded_at for uploaded_at, _ in recent]),
+                "tags": [tags for _, tags in recent]
+            })
+            df["day"] = df.ts.dt.normalize()
             
-            recent_docs = []
-            for doc in documents:
-                if doc.uploaded_at and doc.uploaded_at >= cutoff_date:
-                    recent_docs.append(doc)
-                    
-                    # Daily counts
-                    day_key = doc.uploaded_at.date().isoformat()
-                    daily_counts[day_key] += 1
-                    
-                    # Weekly counts (ISO week)
-                    week_key = f"{doc.uploaded_at.year}-W{doc.uploaded_at.isocalendar()[1]}"
-                    weekly_counts[week_key] += 1
-                    
-                    # Monthly counts
-                    month_key = f"{doc.uploaded_at.year}-{doc.uploaded_at.month:02d}"
-                    monthly_counts[month_key] += 1
-                    
-                    # Topic timeline
-                    for tag in doc.tags:
-                        topic_timeline[tag][day_key] += 1
+            # Group documents by time periods; keys are formatted only once per group
+            daily = df.groupby("day").size()
+            daily_counts = {day.date().isoformat(): int(count) for day, count in daily.items()}
+            
+            # Weekly counts (ISO week)
+            weekly = df.groupby([df.ts.dt.year, df.ts.dt.isocalendar().week]).size()
+            weekly_counts = {f"{year}-W{week}": int(count) for (year, week), count in weekly.items()}
+            
+            # Monthly counts
+            monthly = df.groupby(df.ts.dt.to_period("M")).size()
+            monthly_counts = {str(month): int(count) for month, count in monthly.items()}
+            
+            # Topic timeline
+            topic_timeline = defaultdict(dict)
+            exploded = df[["tags", "day"]].explode("tags").dropna(subset=["tags"])
+            for (tag, day), count in exploded.groupby(["tags", "day"]).size().items():
+                topic_timeline[tag][day.date().isoformat()] = int(count)
             
             # Calculate velocity and acceleration
-            daily_values = list(daily_counts.values())
-            velocity = np.mean(daily_values) if daily_values else 0
-            acceleration = np.std(daily_values) if daily_values else 0
+            velocity, acceleration = _mean_std(list(daily_counts.values()))
             
             return {
-                "total_documents_in_period": len(recent_docs),
+                "total_documents_in_period": len(recent),
                 "daily_upload_velocity": round(velocity, 2),
                 "upload_consistency": round(100 - (acceleration / max(velocity, 1)) * 100, 1),
-                "daily_distribution": dict(daily_counts),
-                "weekly_distribution": dict(weekly_counts),
-                "monthly_distribution": dict(monthly_counts),
+                "daily_distribution": daily_counts,
+                "weekly_distribution": weekly_counts,
+                "monthly_distribution": monthly_counts,
                 "most_active_day": max(daily_counts.items(), key=lambda x: x[1])[0] if daily_counts else None,
                 "topic_timeline": dict(topic_timeline),
                 "peak_activity_periods": self._identify_peak_periods(daily_counts)
@@ -153,7 +198,8 @@ class AdvancedAnalyticsService:
         if len(values) < 3:
             return []
         
-        threshold = np.mean(values) + np.std(values)
+        mean, std = _mean_std(values)
+        threshold = mean + std
         peaks = []
         
         dates = sorted(daily_counts.keys())
@@ -162,12 +208,12 @@ class AdvancedAnalyticsService:
                 peaks.append({
                     "date": date,
                     "document_count": daily_counts[date],
-                    "above_average": round(daily_counts[date] / np.mean(values), 2)
+                    "above_average": round(daily_counts[date] / mean, 2)
                 })
         
         return peaks[:10]  # Return top 10 peaks
     
-    async def _analyze_topic_evolution(self, documents: List[Document], days_back: int) -> Dict[str, Any]:
+    def _analyze_topic_evolution(self, documents: List[Document], days_back: int) -> Dict[str, Any]:
         """Analyze how topics have evolved over time"""
         try:
             if not documents:
@@ -182,9 +228,9 @@ class AdvancedAnalyticsService:
             }
             
             period_topics = {
-                "early": defaultdict(int),
-                "middle": defaultdict(int), 
-                "recent": defaultdict(int)
+                "early": Counter(),
+                "middle": Counter(), 
+                "recent": Counter()
             }
             
             for doc in documents:
@@ -205,23 +251,22 @@ class AdvancedAnalyticsService:
             trending_down = []
             new_topics = []
             
-            all_topics = set()
-            for period_data in period_topics.values():
-                all_topics.update(period_data.keys())
+            early = period_topics["early"]
+            recent = period_topics["recent"]
+            
+            # Topics absent early on; .get() below never inserts zero entries
+            for topic in recent.keys() - early.keys():
+                new_topics.append({
+                    "topic": topic,
+                    "recent_mentions": recent[topic],
+                    "growth_type": "new"
+                })
             
-            for topic in all_topics:
-                early_count = period_topics["early"][topic]
-                middle_count = period_topics["middle"][topic]
-                recent_count = period_topics["recent"][topic]
+            for topic, early_count in early.items():
+                recent_count = recent.get(topic, 0)
                 
                 # Calculate trend
-                if early_count == 0 and recent_count > 0:
-                    new_topics.append({
-                        "topic": topic,
-                        "recent_mentions": recent_count,
-                        "growth_type": "new"
-                    })
-                elif early_count > 0 and recent_count > early_count:
+                if recent_count > early_count:
                     growth_rate = (recent_count - early_count) / early_count * 100
                     trending_up.append({
                         "topic": topic,
@@ -229,7 +274,7 @@ class AdvancedAnalyticsService:
                         "early_count": early_count,
                         "recent_count": recent_count
                     })
-                elif early_count > 0 and recent_count < early_count:
+                elif recent_count < early_count:
                     decline_rate = (early_count - recent_count) / early_count * 100
                     trending_down.append({
                         "topic": topic,
@@ -264,7 +309,7 @@ class AdvancedAnalyticsService:
             logger.error(f"Error analyzing topic evolution: {e}")
             return {}
     
-    async def _calculate_growth_metrics(self, documents: List[Document], days_back: int) -> Dict[str, Any]:
+    def _calculate_growth_metrics(self, documents: List[Document], days_back: int) -> Dict[str, Any]:
         """Calculate various knowledge growth metrics"""
         try:
             cutoff_date = datetime.utcnow() - timedelta(days=days_back)
@@ -277,15 +322,24 @@ class AdvancedAnalyticsService:
             recent_docs.sort(key=lambda x: x.uploaded_at or datetime.min)
             
             # Calculate metrics
-            total_content_words = sum(len(doc.content.split()) for doc in recent_docs)
-            total_unique_tags = len(set(tag for doc in recent_docs for tag in doc.tags))
+            word_counts = np.fromiter(
+                (self._word_count(doc) for doc in recent_docs), dtype=np.int64, count=len(recent_docs)
+            )
+            unique_tags = set()
+            active_days = set()
+            for doc in recent_docs:
+                unique_tags.update(doc.tags)
+                active_days.add(doc.uploaded_at.date())
+            
+            total_content_words = int(word_counts.sum())
+            total_unique_tags = len(unique_tags)
             
             # Knowledge velocity (documents per day)
-            days_with_activity = len(set(doc.uploaded_at.date() for doc in recent_docs if doc.uploaded_at))
+            days_with_activity = len(active_days)
             doc_velocity = len(recent_docs) / max(days_with_activity, 1)
             
             # Content depth (average words per document)
-            avg_content_depth = total_content_words / len(recent_docs)
+            avg_content_depth = float(word_counts.mean())
             
             # Topic diversity (unique tags per document)
             topic_diversity = total_unique_tags / len(recent_docs)
@@ -317,6 +371,13 @@ class AdvancedAnalyticsService:
             logger.error(f"Error calculating growth metrics: {e}")
             return {}
     
+    def _word_count(self, doc: Document) -> int:
+        """Approximate word count by counting spaces, memoized by document id"""
+        count = self._word_count_cache.get(doc.id)
+        if count is None:
+            count = self._word_count_cache[doc.id] = doc.content.count(" ") + 1
+        return count
+    
     def _calculate_learning_intensity(self, documents: List[Document]) -> Dict[str, Any]:
         """Calculate learning intensity metrics"""
         if not documents:
@@ -334,12 +395,12 @@ class AdvancedAnalyticsService:
             intensity = len(week_docs) + sum(len(doc.tags) for doc in week_docs) / 10
             weekly_intensities.append(intensity)
         
-        avg_intensity = np.mean(weekly_intensities) if weekly_intensities else 0
+        avg_intensity, intensity_std = _mean_std(weekly_intensities)
         
         return {
             "average_weekly_intensity": round(avg_intensity, 2),
             "peak_intensity": round(max(weekly_intensities), 2) if weekly_intensities else 0,
-            "intensity_consistency": round(100 - (np.std(weekly_intensities) / max(avg_intensity, 1)) * 100, 1),
+            "intensity_consistency": round(100 - (intensity_std / max(avg_intensity, 1)) * 100, 1),
             "high_intensity_weeks": len([i for i in weekly_intensities if i > avg_intensity * 1.5])
         }
     
@@ -348,17 +409,22 @@ class AdvancedAnalyticsService:
         if not documents:
             return {}
         
-        topic_doc_counts = Counter()
-        topic_content_lengths = defaultdict(int)
+        # tag -> [document count, total content words], one lookup per tag
+        topic_stats: Dict[str, List[int]] = {}
         
         for doc in documents:
-            content_length = len(doc.content.split())
+            content_length = self._word_count(doc)
             for tag in doc.tags:
-                topic_doc_counts[tag] += 1
-                topic_content_lengths[tag] += content_length
+                entry = topic_stats.get(tag)
+                if entry is None:
+                    topic_stats[tag] = [1, content_length]
+                else:
+                    entry[0] += 1
+                    entry[1] += content_length
         
-        breadth_score = len(topic_doc_counts)  # Number of different topics
-        depth_score = np.mean(list(topic_content_lengths.values())) if topic_content_lengths else 0
+        breadth_score = len(topic_stats)  # Number of different topics
+        content_totals = np.fromiter((stats[1] for stats in topic_stats.values()), dtype=np.int64, count=len(topic_stats))
+        depth_score = float(content_totals.mean()) if content_totals.size else 0
         
         # Normalize scores
         breadth_normalized = min(breadth_score / 20, 1.0) * 100  # Cap at 20 topics
@@ -378,9 +444,9 @@ class AdvancedAnalyticsService:
                 {
                     "topic": topic,
                     "document_count": count,
-                    "total_content": topic_content_lengths[topic]
+                    "total_content": total_content
                 }
-                for topic, count in topic_doc_counts.most_common(5)
+                for topic, (count, total_content) in heapq.nlargest(5, topic_stats.items(), key=lambda item: item[1][0])
             ]
         }
     
@@ -411,7 +477,7 @@ class AdvancedAnalyticsService:
                 }
                 
                 # Identify emerging patterns using topic modeling
-                if self.vectorizer and self.topic_model and len(recent_docs) > 5:
+                if self.hasher and self.tfidf and self.topic_model and len(recent_docs) > 5:
                     emerging_topics = await self._identify_emerging_topics(recent_docs)
                     predictions["emerging_topics"] = emerging_topics
             
@@ -435,39 +501,63 @@ class AdvancedAnalyticsService:
             if not documents:
                 return []
             
-            # Prepare text data
-            texts = [doc.content[:1000] for doc in documents]  # Limit length for performance
-            
-            # Fit TF-IDF vectorizer
-            tfidf_matrix = self.vectorizer.fit_transform(texts)
-            
-            # Fit topic model
-            self.topic_model.fit(tfidf_matrix)
-            
-            # Extract topics
-            feature_names = self.vectorizer.get_feature_names_out()
-            topics = []
-            
-            for topic_idx, topic in enumerate(self.topic_model.components_):
-                top_words_idx = topic.argsort()[-10:][::-1]
-                top_words = [feature_names[i] for i in top_words_idx]
-                top_scores = [topic[i] for i in top_words_idx]
-                
-                topics.append({
-                    "topic_id": f"emerging_topic_{topic_idx}",
-                    "keywords": top_words[:5],
-                    "confidence": round(float(np.mean(top_scores)), 3),
-                    "description": f"Topic characterized by: {', '.join(top_words[:3])}"
-                })
-            
-            # Sort by confidence and return top topics
-            topics.sort(key=lambda x: x["confidence"], reverse=True)
-            return topics[:5]
+            # Fitting is CPU-bound; run it off the event loop, one fit at a time on the shared model
+            async with self._topic_model_lock:
+                return await asyncio.to_thread(self._fit_emerging_topics, documents)
             
         except Exception as e:
             logger.error(f"Error identifying emerging topics: {e}")
             return []
     
+    def _fit_emerging_topics(self, documents: List[Document]) -> List[Dict[str, Any]]:
+        """Fit the topic model on the documents and describe its strongest topics"""
+        # Hash then weight; only the IDF statistics are fitted per call. Snippets stream in
+        # as a generator so no intermediate list of texts is built
+        tfidf_matrix = self.tfidf.fit_transform(self.hasher.transform(doc.snippet for doc in documents))
+        
+        # Fit topic model once, then refine the warm model on later calls
+        if self._topic_model_fitted:
+            # Scale online updates to this corpus so component weights stay comparable to a full fit
+            self.topic_model.set_params(total_samples=tfidf_matrix.shape[0])
+            self.topic_model.partial_fit(tfidf_matrix)
+        else:
+            self.topic_model.fit(tfidf_matrix)
+            self._topic_model_fitted = True
+        
+        # Extract topics, ranking only buckets seen in training text; the rest keep their random init weights
+        self._update_hash_vocab(doc.snippet for doc in documents)
+        known_features = np.fromiter(self._hash_vocab, dtype=np.int64, count=len(self._hash_vocab))
+        if not known_features.size:
+            return []
+        topics = []
+        
+        for topic_idx, topic in enumerate(self.topic_model.components_):
+            top_words_idx = known_features[topic[known_features].argsort()[-10:][::-1]]
+            top_words = [self._hash_vocab[i] for i in top_words_idx.tolist()]
+            
+            topics.append({
+                "topic_id": f"emerging_topic_{topic_idx}",
+                "keywords": top_words[:5],
+                "confidence": round(float(topic[top_words_idx].mean()), 3),
+                "description": f"Topic characterized by: {', '.join(top_words[:3])}"
+            })
+        
+        # Sort by confidence and return top topics
+        topics.sort(key=lambda x: x["confidence"], reverse=True)
+        return topics[:5]
+    
+    def _update_hash_vocab(self, texts: Iterable[str]):
+        """Extend the hashed-feature to token reverse map with tokens seen in the training texts"""
+        analyzer = self.hasher.build_analyzer()
+        vocab = self._hash_vocab
+        tokens = set()
+        for text in texts:
+            tokens.update(analyzer(text))
+        for token in tokens:
+            # Same bucket HashingVectorizer assigns; first token seen keeps a collided bucket
+            index = abs(murmurhash3_32(token, seed=0)) % HASH_FEATURES
+            vocab.setdefault(index, token)
+    
     async def _identify_declining_interests(self, documents: List[Document]) -> List[Dict[str, Any]]:
         """Identify topics that are declining in interest"""
         try:
@@ -523,7 +613,7 @@ class AdvancedAnalyticsService:
             topic_content = defaultdict(int)
             
             for doc in documents:
-                content_length = len(doc.content.split())
+                content_length = self._word_count(doc)
                 for tag in doc.tags:
                     topic_counts[tag] += 1
                     topic_content[tag] += content_length
@@ -547,19 +637,12 @@ class AdvancedAnalyticsService:
                 # Identify topics that could benefit from connections
                 graph_data = await self.knowledge_graph.get_knowledge_graph_data(limit=100)
                 if graph_data.get("nodes"):
-                    isolated_topics = []
-                    edge_counts = defaultdict(int)
+                    nodes = graph_data["nodes"]
+                    connections, sizes = self._build_graph_arrays(nodes, graph_data.get("edges", []))
+                    isolated = np.nonzero((connections <= 1) & (sizes > 20))[0][:3]
+                    isolated_topics = [nodes[i]["label"] for i in isolated]
                     
-                    for edge in graph_data.get("edges", []):
-                        edge_counts[edge["source"]] += 1
-                        edge_counts[edge["target"]] += 1
-                    
-                    for node in graph_data["nodes"]:
-                        connections = edge_counts.get(node["id"], 0)
-                        if connections <= 1 and node.get("size", 0) > 20:
-                            isolated_topics.append(node["label"])
-                    
-                    for topic in isolated_topics[:3]:
+                    for topic in isolated_topics:
                         recommendations.append({
                             "type": "connect_knowledge",
                             "topic": topic,
@@ -578,16 +661,21 @@ class AdvancedAnalyticsService:
         """Save evolution analysis for historical comparison"""
         try:
             snapshot_file = f"{self.analytics_storage}/evolution_snapshot_{datetime.utcnow().date()}.json"
-            with open(snapshot_file, 'w') as f:
-                json.dump(analysis, f, indent=2)
+            data = orjson.dumps(
+                analysis,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            )
+            await asyncio.to_thread(Path(snapshot_file).write_bytes, data)
         except Exception as e:
             logger.error(f"Error saving evolution snapshot: {e}")
     
     async def generate_impact_analysis(self, user_id: str = "default") -> Dict[str, Any]:
         """Analyze the impact and influence of different concepts"""
         try:
-            documents = await self.vector_store.get_documents(limit=1000)
-            graph_data = await self.knowledge_graph.get_knowledge_graph_data(limit=200)
+            documents, graph_data = await asyncio.gather(
+                self._get_documents(limit=1000),
+                self.knowledge_graph.get_knowledge_graph_data(limit=200)
+            )
             
             impact_analysis = {
                 "user_id": user_id,
@@ -632,34 +720,52 @@ class AdvancedAnalyticsService:
             logger.error(f"Error generating impact analysis: {e}")
             return {"error": str(e)}
     
+    def _edge_index_arrays(self, nodes: List[Dict], edges: List[Dict]) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Deduplicated undirected edges as (low, high) node-index arrays plus the index space size"""
+        id_to_idx = {node["id"]: i for i, node in enumerate(nodes)}
+        next_idx = len(nodes)
+        
+        def index(node_id):
+            # Endpoints outside the node list still count as neighbors, so they get trailing indices
+            nonlocal next_idx
+            idx = id_to_idx.get(node_id)
+            if idx is None:
+                idx = id_to_idx[node_id] = next_idx
+                next_idx += 1
+            return idx
+        
+        src = np.fromiter((index(edge["source"]) for edge in edges), dtype=np.int64, count=len(edges))
+        dst = np.fromiter((index(edge["target"]) for edge in edges), dtype=np.int64, count=len(edges))
+        
+        # Both directions of a co-occurrence are returned by the graph; keep each pair once, no self-loops
+        low = np.minimum(src, dst)
+        high = np.maximum(src, dst)
+        keep = low != high
+        pair_keys = np.unique(low[keep] * next_idx + high[keep])
+        return pair_keys // next_idx, pair_keys % next_idx, next_idx
+    
+    def _build_graph_arrays(self, nodes: List[Dict], edges: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-node distinct-neighbor degree and size arrays, aligned with the node list"""
+        low, high, index_size = self._edge_index_arrays(nodes, edges)
+        degree = (np.bincount(low, minlength=index_size) + np.bincount(high, minlength=index_size))[:len(nodes)]
+        sizes = np.fromiter((node.get("size", 0) for node in nodes), dtype=np.float64, count=len(nodes))
+        return degree, sizes
+    
     def _calculate_centrality(self, nodes: List[Dict], edges: List[Dict]) -> Dict[str, float]:
         """Calculate centrality measures for nodes"""
         try:
-            # Build adjacency list
-            adjacency = defaultdict(set)
-            for edge in edges:
-                source = edge["source"]
-                target = edge["target"]
-                adjacency[source].add(target)
-                adjacency[target].add(source)
-            
-            centrality_scores = {}
             total_nodes = len(nodes)
+            degree, sizes = self._build_graph_arrays(nodes, edges)
             
-            for node in nodes:
-                node_id = node["id"]
-                # Degree centrality (normalized)
-                degree = len(adjacency[node_id])
-                degree_centrality = degree / (total_nodes - 1) if total_nodes > 1 else 0
-                
-                # Combine with node size (importance)
-                size_weight = node.get("size", 0) / 100  # Normalize size
-                
-                # Combined influence score
-                influence = (degree_centrality * 0.7) + (size_weight * 0.3)
-                centrality_scores[node_id] = influence
+            # Degree centrality (normalized)
+            degree_centrality = degree / (total_nodes - 1) if total_nodes > 1 else np.zeros(total_nodes)
+            
+            # Combine with node size (importance)
+            size_weight = sizes / 100  # Normalize size
             
-            return centrality_scores
+            # Combined influence score
+            influence = (degree_centrality * 0.7) + (size_weight * 0.3)
+            return dict(zip((node["id"] for node in nodes), influence.tolist()))
             
         except Exception as e:
             logger.error(f"Error calculating centrality: {e}")
@@ -671,39 +777,24 @@ class AdvancedAnalyticsService:
             if len(nodes) < 3:
                 return 0.0
             
-            # Build adjacency list
-            adjacency = defaultdict(set)
-            for edge in edges:
-                source = edge["source"]
-                target = edge["target"]
-                adjacency[source].add(target)
-                adjacency[target].add(source)
+            low, high, index_size = self._edge_index_arrays(nodes, edges)
             
-            total_clustering = 0
-            nodes_with_edges = 0
+            # Symmetric sparse adjacency; diag(A^3) counts each triangle at a node twice
+            adjacency = csr_matrix(
+                (np.ones(2 * low.size), (np.concatenate([low, high]), np.concatenate([high, low]))),
+                shape=(index_size, index_size)
+            )
+            triangles = np.asarray((adjacency @ adjacency).multiply(adjacency).sum(axis=1)).ravel()[:len(nodes)] / 2
+            degree = np.diff(adjacency.indptr)[:len(nodes)]
             
-            for node in nodes:
-                node_id = node["id"]
-                neighbors = list(adjacency[node_id])
-                
-                if len(neighbors) < 2:
-                    continue
-                
-                nodes_with_edges += 1
-                
-                # Count triangles
-                triangles = 0
-                possible_triangles = len(neighbors) * (len(neighbors) - 1) / 2
-                
-                for i, neighbor1 in enumerate(neighbors):
-                    for neighbor2 in neighbors[i+1:]:
-                        if neighbor2 in adjacency[neighbor1]:
-                            triangles += 1
-                
-                local_clustering = triangles / possible_triangles if possible_triangles > 0 else 0
-                total_clustering += local_clustering
+            # Local clustering over nodes that can close a triangle
+            has_pairs = degree >= 2
+            if not has_pairs.any():
+                return 0.0
+            possible_triangles = degree[has_pairs] * (degree[has_pairs] - 1) / 2
+            local_clustering = triangles[has_pairs] / possible_triangles
             
-            return round(total_clustering / nodes_with_edges, 4) if nodes_with_edges > 0 else 0.0
+            return round(float(local_clustering.mean()), 4)
             
         except Exception as e:
             logger.error(f"Error calculating clustering coefficient: {e}")
@@ -771,7 +862,7 @@ class AdvancedAnalyticsService:
         """Check analytics service health"""
         return {
             "status": "healthy",
-            "ml_models_initialized": bool(self.vectorizer and self.topic_model),
+            "ml_models_initialized": bool(self.hasher and self.tfidf and self.topic_model),
             "storage_accessible": Path(self.analytics_storage).exists(),
             "capabilities": [
                 "Knowledge evolution analysis",
@@ -69,28 +69,48 @@ class KnowledgeGraph:
             
             # Process document content with spaCy
             doc_nlp = self.nlp(document.content[:10000])  # Limit for performance
-            
-            # Extract entities
-            entities = self._extract_entities(doc_nlp)
-            
-            # Extract relationships
-            relationships = self._extract_relationships(doc_nlp, entities)
-            
-            # Extract concepts from document
-            concepts = self._extract_concepts(document, doc_nlp)
-            
-            return {
-                "document_id": document.id,
-                "entities": entities,
-                "relationships": relationships,
-                "concepts": concepts,
-                "processed_at": datetime.utcnow().isoformat()
-            }
+            return self._build_knowledge(document, doc_nlp)
             
         except Exception as e:
             logger.error(f"Error extracting entities from document {document.id}: {e}")
             return self._fallback_entity_extraction(document)
     
+    async def extract_batch(self, documents: List[Document]) -> List[Dict[str, Any]]:
+        """Extract entities and relationships for several documents in one spaCy pass"""
+        try:
+            if not self.nlp:
+                return [self._fallback_entity_extraction(document) for document in documents]
+            
+            # nlp.pipe batches tokenization and model calls across all texts
+            texts = [document.content[:10000] for document in documents]
+            return [
+                self._build_knowledge(document, doc_nlp)
+                for document, doc_nlp in zip(documents, self.nlp.pipe(texts))
+            ]
+            
+        except Exception as e:
+            logger.error("Error in batch entity extraction: %s", e)
+            return [self._fallback_entity_extraction(document) for document in documents]
+    
+    def _build_knowledge(self, document: Document, doc_nlp) -> Dict[str, Any]:
+        """Build knowledge data for a document from its spaCy doc"""
+        # Extract entities
+        entities = self._extract_entities(doc_nlp)
+        
+        # Extract relationships
+        relationships = self._extract_relationships(doc_nlp, entities)
+        
+        # Extract concepts from document
+        concepts = self._extract_concepts(document, doc_nlp)
+        
+        return {
+            "document_id": document.id,
+            "entities": entities,
+            "relationships": relationships,
+            "concepts": concepts,
+            "processed_at": datetime.utcnow().isoformat()
+        }
+    
     def _extract_entities(self, doc) -> List[Dict[str, Any]]:
         """Extract named entities from spaCy doc"""
         entities = []
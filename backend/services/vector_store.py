@@ -1,6 +1,6 @@
 import os
 import logging
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Tuple, NamedTuple
 from datetime import datetime
 import asyncio
 import json
@@ -14,6 +14,14 @@ from services.multimodal_embedder import MultimodalEmbedder
 
 logger = logging.getLogger(__name__)
 
+class DocumentColumns(NamedTuple):
+    """Column-oriented view of documents for bulk analysis"""
+    ids: np.ndarray
+    titles: np.ndarray
+    snippets: List[str]  # Summary, or the start of the content when there is none
+    tags: List[List[str]]
+    word_counts: np.ndarray
+
 class VectorStore:
     def __init__(self):
         self.supabase: Optional[Client] = None
@@ -71,7 +79,7 @@ class VectorStore:
                 "file_type": document.file_type.value,
                 "file_path": document.file_path,
                 "size_bytes": document.size_bytes,
-                "uploaded_at": document.uploaded_at.isoformat(),
+                "uploaded_at": document.uploaded_at_iso,
                 "processed_at": document.processed_at.isoformat() if document.processed_at else None
             }
             
@@ -251,20 +259,108 @@ class VectorStore:
     
     async def _get_local_documents(self, skip: int, limit: int) -> List[Document]:
         """Get documents from local storage"""
+        return [self._dict_to_document(doc_data) for doc_data in self._get_local_document_rows(skip, limit)]
+    
+    def _get_local_document_rows(self, skip: int, limit: int) -> List[Dict[str, Any]]:
+        """Read raw document records from local storage"""
         storage_dir = "local_storage"
         if not os.path.exists(storage_dir):
             return []
         
-        documents = []
+        rows = []
         doc_files = [f for f in os.listdir(storage_dir) if f.endswith('.json') and not f.startswith('chunk_')]
         
         for filename in doc_files[skip:skip + limit]:
             doc_file = os.path.join(storage_dir, filename)
             with open(doc_file, 'r') as f:
-                doc_data = json.load(f)
-            documents.append(self._dict_to_document(doc_data))
+                rows.append(json.load(f))
         
-        return documents
+        return rows
+    
+    async def get_documents_soa(self, skip: int = 0, limit: int = 50) -> DocumentColumns:
+        """Get documents as columns, skipping per-row Document model construction"""
+        try:
+            if self.supabase:
+                result = self.supabase.table("documents").select("id,title,summary,content,tags").range(skip, skip + limit - 1).execute()
+                rows = result.data
+            else:
+                rows = self._get_local_document_rows(skip, limit)
+        except Exception as e:
+            logger.error(f"Error getting documents: {e}")
+            rows = []
+        return self._rows_to_columns(rows)
+    
+    @staticmethod
+    def _rows_to_columns(rows: List[Dict[str, Any]]) -> DocumentColumns:
+        """Convert raw document records to a DocumentColumns view"""
+        contents = [row.get("content") or "" for row in rows]
+        return DocumentColumns(
+            ids=np.array([row["id"] for row in rows], dtype=object),
+            titles=np.array([row.get("title", "") for row in rows], dtype=object),
+            snippets=[row.get("summary") or content[:500] for row, content in zip(rows, contents)],
+            tags=[row.get("tags") or [] for row in rows],
+            # Counting spaces avoids materializing a token list per document
+            word_counts=np.fromiter((content.count(' ') + 1 for content in contents), dtype=np.int32, count=len(contents))
+        )
+    
+    async def get_document(self, document_id: str) -> Optional[Document]:
+        """Get a single document by ID"""
+        try:
+            if self.supabase:
+                result = self.supabase.table("documents").select("*").eq("id", document_id).limit(1).execute()
+                return self._dict_to_document(result.data[0]) if result.data else None
+            else:
+                doc_file = os.path.join("local_storage", f"{document_id}.json")
+                if not os.path.exists(doc_file):
+                    return None
+                with open(doc_file, 'r') as f:
+                    return self._dict_to_document(json.load(f))
+        except Exception as e:
+            logger.error(f"Error getting document {document_id}: {e}")
+            return None
+    
+    async def has_documents(self) -> bool:
+        """Cheap check for whether any document is stored"""
+        try:
+            if self.supabase:
+                result = self.supabase.table("documents").select("id").limit(1).execute()
+                return bool(result.data)
+            else:
+                storage_dir = "local_storage"
+                if not os.path.exists(storage_dir):
+                    return False
+                return any(
+                    entry.name.endswith('.json') and not entry.name.startswith('chunk_')
+                    for entry in os.scandir(storage_dir)
+                )
+        except Exception as e:
+            logger.error(f"Error checking for documents: {e}")
+            return False
+    
+    async def get_latest_document(self) -> Optional[Document]:
+        """Get the most recently uploaded document"""
+        try:
+            if self.supabase:
+                result = self.supabase.table("documents").select("*").order("uploaded_at", desc=True).limit(1).execute()
+                return self._dict_to_document(result.data[0]) if result.data else None
+            else:
+                # Document files are written at upload, so the newest file holds the latest document
+                storage_dir = "local_storage"
+                if not os.path.exists(storage_dir):
+                    return None
+                latest = max(
+                    (entry for entry in os.scandir(storage_dir)
+                     if entry.name.endswith('.json') and not entry.name.startswith('chunk_')),
+                    key=lambda entry: entry.stat().st_mtime,
+                    default=None
+                )
+                if latest is None:
+                    return None
+                with open(latest.path, 'r') as f:
+                    return self._dict_to_document(json.load(f))
+        except Exception as e:
+            logger.error(f"Error getting latest document: {e}")
+            return None
     
     def _dict_to_document(self, doc_data: Dict[str, Any]) -> Document:
         """Convert dictionary to Document model"""
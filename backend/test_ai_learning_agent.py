@@ -0,0 +1,61 @@
+"""
+Daily insights caching tests for the AI Learning Agent
+Degraded results must be returned but never cached
+"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from services.ai_learning_agent import AILearningAgent
+
+HEALTHY_GAPS = {
+    "knowledge_coverage": {"top_topic": ("python", 3), "total_documents": 3},
+    "learning_opportunities": []
+}
+
+def make_agent(knowledge_gaps, highlight):
+    """Agent with the analysis and highlight fetch stubbed out"""
+    agent = AILearningAgent(knowledge_graph=None, vector_store=None, rag_engine=None)
+    agent.analyze_knowledge_gaps = AsyncMock(return_value=knowledge_gaps)
+    agent._fetch_highlight_document = highlight
+    return agent
+
+def recent_document():
+    return SimpleNamespace(
+        title="Notes", summary="", top_tags=("python",), uploaded_at_iso="2026-01-01T00:00:00"
+    )
+
+def test_healthy_insights_are_cached():
+    agent = make_agent(HEALTHY_GAPS, AsyncMock(return_value=recent_document()))
+
+    first = asyncio.run(agent.get_daily_insights("alice"))
+    second = asyncio.run(agent.get_daily_insights("alice"))
+
+    assert second is first
+    assert agent.analyze_knowledge_gaps.await_count == 1
+
+def test_failed_analysis_is_not_cached():
+    agent = make_agent({"error": "graph unavailable"}, AsyncMock(return_value=recent_document()))
+
+    result = asyncio.run(agent.get_daily_insights("alice"))
+    asyncio.run(agent.get_daily_insights("alice"))
+
+    assert result["insights"] == []
+    assert agent._insights_cache == {}
+    assert agent.analyze_knowledge_gaps.await_count == 2
+
+def test_failed_highlight_fetch_is_not_cached():
+    agent = make_agent(HEALTHY_GAPS, AsyncMock(side_effect=RuntimeError("db down")))
+
+    result = asyncio.run(agent.get_daily_insights("alice"))
+    asyncio.run(agent.get_daily_insights("alice"))
+
+    assert result["knowledge_highlight"] is None
+    assert agent._insights_cache == {}
+    assert agent.analyze_knowledge_gaps.await_count == 2